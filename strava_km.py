@@ -1,15 +1,60 @@
 import os
-import requests
+import json
 import time
+import hashlib
+import requests
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from pathlib import Path
+from string import Template
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from datetime import datetime, timezone
 from dateutil import parser as dtparser
 from PIL import Image, ImageDraw, ImageFont
 
+try:
+    import orjson
+    json_loads = orjson.loads
+except ImportError:  # orjson är valfritt
+    json_loads = json.loads
+
+try:
+    import ijson
+except ImportError:  # ijson är valfritt
+    ijson = None
+
 # Färger (Team Rynkeby)
 YELLOW = (254, 221, 0)   # #FEDD00
 BLACK  = (0, 0, 0)
 WHITE  = (255, 255, 255)
 
+# Delad HTTP-session: keep-alive över token-refresh och alla sidor,
+# samt retry/backoff på 429/5xx på ett ställe.
+SESSION = requests.Session()
+SESSION.mount(
+    "https://",
+    HTTPAdapter(
+        max_retries=Retry(
+            total=5,
+            backoff_factor=1.5,
+            status_forcelist=[429, 500, 502, 503, 504],
+            raise_on_status=False,
+        )
+    ),
+)
+
+# Unix-epoch som tz-medveten datetime (för iso_to_unix)
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+# Enkel filcache för senaste km-resultat och access_token. Hjälper bara vid
+# lokala/upprepade körningar: i update.yml får varje körning en ny runner
+# (docs/.cache/ är gitignorerad, ~/.cache slängs) och det dagliga cron-jobbet
+# ligger långt utanför både TTL och tokenens giltighetstid.
+CACHE_DIR = os.path.join("docs", ".cache")
+# access_token cachas utanför docs/ (Pages-roten), endast läsbar för ägaren
+TOKEN_CACHE = os.path.join(os.path.expanduser("~"), ".cache", "rynkeby-status", "token.json")
+
 # ---------------------------
 # Hjälpfunktioner & util
 # ---------------------------
@@ -19,27 +64,95 @@ def env(key, default=None, required=False):
         raise RuntimeError(f"Missing required env var: {key}")
     return v
 
+def cache_read(path):
+    """Läser en JSON-post (dict) från path, eller None om den saknas/är trasig."""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return data if isinstance(data, dict) else None
+
+def cache_write(path, data, mode=0o644):
+    """Skriver en JSON-post till path atomiskt (tmp-fil + os.replace) med filrättigheter mode."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f"{path}.tmp"
+    try:
+        os.unlink(tmp)  # så att mode gäller även om en gammal tmp-fil ligger kvar
+    except FileNotFoundError:
+        pass
+    fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_EXCL, mode)
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        json.dump(data, f)
+    os.replace(tmp, path)
+
+def cache_delete(path):
+    try:
+        os.unlink(path)
+    except FileNotFoundError:
+        pass
+
+def credentials_key():
+    """sha1 av STRAVA_CLIENT_ID|STRAVA_REFRESH_TOKEN; byts secrets blir cacheposterna ogiltiga."""
+    client_id = env("STRAVA_CLIENT_ID", required=True)
+    refresh_token = env("STRAVA_REFRESH_TOKEN", required=True)
+    return hashlib.sha1(f"{client_id}|{refresh_token}".encode("utf-8")).hexdigest()
+
+def use_ytd_stats():
+    return env("USE_YTD_STATS", "false").strip().lower() == "true"
+
+def km_cache_path(start_iso, end_iso):
+    # Nyckeln inkluderar credentials och YTD-flaggan, som båda ändrar resultatet
+    raw = f"{start_iso}|{end_iso}|{credentials_key()}|{use_ytd_stats()}"
+    key = hashlib.sha1(raw.encode("utf-8")).hexdigest()[:16]
+    return os.path.join(CACHE_DIR, f"km_{key}.json")
+
 def iso_to_unix(dt):
     """Tar 'YYYY-MM-DD' eller ISO-sträng -> unix-epoch (sekunder, UTC)."""
     if isinstance(dt, datetime):
         d = dt
     else:
-        d = dtparser.parse(str(dt))
+        s = str(dt).strip()
+        if len(s) == 10 and s[4] == "-" and s[7] == "-":
+            # Snabbväg för rena datum (vanligaste fallet)
+            try:
+                d = datetime(int(s[:4]), int(s[5:7]), int(s[8:10]), tzinfo=timezone.utc)
+            except ValueError:
+                d = dtparser.parse(s)
+        else:
+            try:
+                d = datetime.fromisoformat(s)
+            except ValueError:
+                d = dtparser.parse(s)
     if d.tzinfo is None:
         d = d.replace(tzinfo=timezone.utc)
-    return int(d.timestamp())
+    return int((d - EPOCH).total_seconds())
+
+# (id(font), text) -> (font, (w, h)); fonten sparas så att id:t inte återanvänds
+_TEXT_WH_CACHE = {}
 
 def text_wh(draw: ImageDraw.ImageDraw, text: str, font: ImageFont.ImageFont):
     """
-    Returnerar (bredd, höjd) för text i Pillow 10+ (textbbox) med fallback för äldre.
+    Returnerar (bredd, höjd) för text via textbbox (Pillow 10+), memoiserat per font och text.
     """
-    try:
-        left, top, right, bottom = draw.textbbox((0, 0), text, font=font)
-        return right - left, bottom - top
-    except AttributeError:
-        return draw.textsize(text, font=font)
-
+    key = (id(font), text)
+    hit = _TEXT_WH_CACHE.get(key)
+    if hit is not None and hit[0] is font:
+        return hit[1]
+    left, top, right, bottom = draw.textbbox((0, 0), text, font=font)
+    wh = (right - left, bottom - top)
+    _TEXT_WH_CACHE[key] = (font, wh)
+    return wh
+
+# bold -> sökväg till första fontfil som gick att öppna
+_FONT_PATH = {}
+
+@lru_cache(maxsize=32)
 def load_font(size, bold=True):
+    path = _FONT_PATH.get(bold)
+    if path is not None:
+        return ImageFont.truetype(path, size)
+
     candidates = []
     if bold:
         candidates += [
@@ -52,15 +165,64 @@ def load_font(size, bold=True):
     ]
     for path in candidates:
         try:
-            return ImageFont.truetype(path, size)
+            font = ImageFont.truetype(path, size)
         except Exception:
             continue
+        _FONT_PATH[bold] = path
+        return font
     return ImageFont.load_default()
 
+@lru_cache(maxsize=None)
+def rounded_rect(w, h, r, fill):
+    """
+    Förrenderad RGBA-rektangel med rundade hörn, motsvarar
+    rounded_rectangle([x, y, x + w, y + h]) (inklusiva koordinater).
+    """
+    im = Image.new("RGBA", (w + 1, h + 1), (0, 0, 0, 0))
+    ImageDraw.Draw(im).rounded_rectangle([0, 0, w, h], radius=r, fill=fill)
+    return im
+
+def paste_rounded(img, xy, w, h, r, fill):
+    card = rounded_rect(w, h, r, fill)
+    img.paste(card, xy, card)
+
+def card_canvas(W, H, pad, r, fill=YELLOW, bg=WHITE):
+    """
+    Canvas med ett rundat kort i [pad, pad, W - pad, H - pad]. Kort och ram
+    fylls som raka rektanglar; bara de fyra hörnen alfa-blittas från en
+    cachad mall.
+    """
+    img = Image.new("RGB", (W, H), fill)
+    x0, y0, x1, y1 = pad, pad, W - pad, H - pad  # inklusiva koordinater
+    img.paste(bg, (0, 0, W, y0))
+    img.paste(bg, (0, y1 + 1, W, H))
+    img.paste(bg, (0, 0, x0, H))
+    img.paste(bg, (x1 + 1, 0, W, H))
+
+    tmpl = rounded_rect(4 * r, 4 * r, r, fill)
+    size = tmpl.size[0]
+    c = r + 1
+    for sx, sy, dx, dy in (
+        (0, 0, x0, y0),
+        (size - c, 0, x1 + 1 - c, y0),
+        (0, size - c, x0, y1 + 1 - c),
+        (size - c, size - c, x1 + 1 - c, y1 + 1 - c),
+    ):
+        corner = tmpl.crop((sx, sy, sx + c, sy + c))
+        img.paste(bg, (dx, dy, dx + c, dy + c))
+        img.paste(corner, (dx, dy), corner)
+    return img
+
 # ---------------------------
 # Strava API
 # ---------------------------
 
+class StravaUnauthorized(RuntimeError):
+    """401 från Strava: access_token ogiltig eller saknar rätt scope."""
+
+# Aktivitetstyper som räknas som cykelpass
+COUNT_TYPES = frozenset({"Ride", "GravelRide", "VirtualRide"})
+
 def should_count(activity: dict) -> bool:
     """
     Returnerar True om aktiviteten ska räknas som cykelpass.
@@ -68,22 +230,30 @@ def should_count(activity: dict) -> bool:
     - Räknar inte: EBikeRide (m.fl.)
     Stödjer både sport_type (nyare fält) och type (äldre fält).
     """
-    # Nyare Strava: sport_type
-    st = (activity.get("sport_type") or "").strip()
-    if st:
-        return st in ("Ride", "GravelRide", "VirtualRide")
+    # Nyare Strava: sport_type, annars äldre fältet type
+    return (activity.get("sport_type") or activity.get("type")) in COUNT_TYPES
 
-    # Äldre fält: type
-    t = (activity.get("type") or "").strip()
-    return t in ("Ride", "GravelRide", "VirtualRide")
 
-
-def refresh_access_token():
+def refresh_access_token(force=False):
+    """
+    Returnerar (access_token, från_cache). Med force=True ignoreras cachen och
+    en ny token hämtas alltid.
+    """
     client_id = env("STRAVA_CLIENT_ID", required=True)
     client_secret = env("STRAVA_CLIENT_SECRET", required=True)
     refresh_token = env("STRAVA_REFRESH_TOKEN", required=True)
 
-    r = requests.post(
+    # Återanvänd cachad token om den hör till samma credentials och är giltig minst 5 min till
+    cred_key = credentials_key()
+    cached = None if force else cache_read(TOKEN_CACHE)
+    if (
+        cached
+        and cached.get("cred") == cred_key
+        and cached.get("expires_at", 0) - 300 > time.time()
+    ):
+        return cached["access_token"], True
+
+    r = SESSION.post(
         "https://www.strava.com/api/v3/oauth/token",
         data={
             "client_id": client_id,
@@ -94,7 +264,39 @@ def refresh_access_token():
         timeout=30,
     )
     r.raise_for_status()
-    return r.json()["access_token"]
+    data = r.json()
+    if data.get("expires_at"):
+        try:
+            cache_write(
+                TOKEN_CACHE,
+                {"cred": cred_key, "access_token": data["access_token"], "expires_at": data["expires_at"]},
+                mode=0o600,
+            )
+        except OSError:
+            pass  # cachen är best-effort
+    return data["access_token"], False
+
+def is_ytd_period(start_iso, end_iso):
+    """True om perioden är 1 jan innevarande år -> idag (UTC)."""
+    today = datetime.now(timezone.utc).date()
+    try:
+        start = datetime.fromisoformat(str(start_iso)).date()
+    except ValueError:
+        return False
+    return start == today.replace(month=1, day=1) and str(end_iso) == today.isoformat()
+
+def fetch_ytd_km():
+    """
+    Hämtar årets cykeldistans från /athletes/{id}/stats i ett anrop.
+    OBS: Strava räknar bara aktiviteter synliga för alla, och typfiltret i
+    should_count kan inte tillämpas, därför är vägen opt-in (USE_YTD_STATS).
+    """
+    r = SESSION.get("https://www.strava.com/api/v3/athlete", timeout=30)
+    r.raise_for_status()
+    athlete_id = r.json()["id"]
+    r = SESSION.get(f"https://www.strava.com/api/v3/athletes/{athlete_id}/stats", timeout=30)
+    r.raise_for_status()
+    return float(r.json()["ytd_ride_totals"]["distance"]) / 1000.0
 
 def fetch_km(access_token, start_iso, end_iso):
     after = iso_to_unix(start_iso)
@@ -105,68 +307,125 @@ def fetch_km(access_token, start_iso, end_iso):
             f"Ogiltig period: PERIOD_START={start_iso} måste vara före PERIOD_END={end_iso}."
         )
 
+    SESSION.headers["Authorization"] = f"Bearer {access_token}"
+
+    # Genväg för hittills-i-år: ett anrop istället för paginering
+    if use_ytd_stats() and is_ytd_period(start_iso, end_iso):
+        try:
+            return fetch_ytd_km()
+        except (requests.RequestException, KeyError, TypeError, ValueError):
+            pass  # fall tillbaka på pagineringen nedan
+
     url = "https://www.strava.com/api/v3/athlete/activities"
-    headers = {"Authorization": f"Bearer {access_token}"}
     per_page = 200
+    window = 4  # antal sidor som hämtas parallellt
     page = 1
-    total_km = 0.0
-
-    # Minimal retry/backoff
-    def _get(params, tries=5, base_sleep=1.5):
-        for i in range(tries):
-            resp = requests.get(url, headers=headers, params=params, timeout=30)
-            # Särskilda fel först
-            if resp.status_code == 401:
-                raise RuntimeError(
-                    "401 från Strava: access_token saknar troligen 'activity:read'/'activity:read_all' "
-                    "eller är ogiltig. Gör om OAuth och uppdatera STRAVA_REFRESH_TOKEN i Secrets."
-                )
-            if resp.status_code == 400:
-                raise RuntimeError("400 från Strava: kontrollera att 'after' < 'before' (startdatum före slutdatum).")
-            if resp.status_code in (429, 500, 502, 503, 504):
-                # backoff och försök igen
-                sleep_s = base_sleep * (2 ** i)
-                time.sleep(sleep_s)
-                continue
-            resp.raise_for_status()
+
+    # Retry/backoff på 429/5xx sköts av SESSION:s HTTPAdapter
+    def _get(params):
+        resp = SESSION.get(url, params=params, timeout=30, stream=True)
+        if resp.ok:
             return resp
-        # Om vi hamnar här: för många misslyckade försök
+        # stream=True: stäng innan vi kastar så att anslutningen går tillbaka till poolen
+        resp.close()
+        # Särskilda fel först
+        if resp.status_code == 401:
+            cache_delete(TOKEN_CACHE)  # nästa körning ska hämta ny token
+            raise StravaUnauthorized(
+                "401 från Strava: access_token saknar troligen 'activity:read'/'activity:read_all' "
+                "eller är ogiltig. Gör om OAuth och uppdatera STRAVA_REFRESH_TOKEN i Secrets."
+            )
+        if resp.status_code == 400:
+            raise RuntimeError("400 från Strava: kontrollera att 'after' < 'before' (startdatum före slutdatum).")
         resp.raise_for_status()
 
-    while True:
+    def _fetch_page(page):
+        """Hämtar en sida -> (antal aktiviteter, meter som räknas)."""
         params = {"after": after, "before": before, "page": page, "per_page": per_page}
-        resp = _get(params)
-        activities = resp.json()
-        if not activities:
-            break
-
-        for a in activities:
-            if should_count(a):
-                meters = a.get("distance") or 0
-                total_km += float(meters) / 1000.0
-
-        page += 1
-
-    return total_km
+        # Lokal bindning av should_count för båda vägarna nedan
+        _sc = should_count
+        with _get(params) as resp:
+            if ijson is None:
+                activities = json_loads(resp.content)
+                meters = sum((a.get("distance") or 0.0) for a in activities if _sc(a))
+                return len(activities), meters
+
+            # Strömma sidan med ijson
+            resp.raw.decode_content = True
+            n = 0
+            meters = 0.0
+            for a in ijson.items(resp.raw, "item", use_float=True):
+                n += 1
+                if _sc(a):
+                    meters += a.get("distance") or 0.0
+            return n, meters
+
+    # Sida 1 hämtas ensam: de flesta konton ryms på en sida och ska inte
+    # kosta fler anrop (rate limit). Först om den är full hämtas resten i
+    # fönster om `window` parallellt; sidorna läses i ordning och allt efter
+    # första ofullständiga sida (< per_page) kastas.
+    n, total_m = _fetch_page(page)
+    if n < per_page:
+        return total_m / 1000.0
+    page += 1
+
+    # Medvetet val: trådarna delar SESSION. requests.Session är inte dokumenterat
+    # trådsäker, men här görs bara GET mot samma värd med oförändrade headers,
+    # och urllib3:s anslutningspool (10 anslutningar >= window) är trådsäker.
+    with ThreadPoolExecutor(max_workers=window) as pool:
+        while True:
+            futures = [pool.submit(_fetch_page, p) for p in range(page, page + window)]
+            done = False
+            for fut in futures:
+                n, meters = fut.result()
+                total_m += meters
+                if n < per_page:
+                    done = True
+                    break
+            if done:
+                for fut in futures:
+                    fut.cancel()
+                break
+            page += window
+
+    return total_m / 1000.0
 
 # ---------------------------
 # Rendering (Stil 3)
 # ---------------------------
+SVG_TMPL = Template("""<?xml version="1.0" encoding="UTF-8"?>
+<svg width="$W" height="$H" viewBox="0 0 $W $H" xmlns="http://www.w3.org/2000/svg">
+  <rect x="0" y="0" width="$W" height="$H" fill="#FFFFFF"/>
+  <rect x="$PAD" y="$PAD" rx="$card_r" ry="$card_r" width="$card_w" height="$card_h" fill="#FEDD00"/>
+  <text x="$cx" y="$km_y" font-size="140" font-family="DejaVu Sans, Arial, sans-serif" font-weight="700" fill="#000000" text-anchor="middle">$km_txt</text>
+  <rect x="$bar_x" y="$bar_y" rx="$bar_r" ry="$bar_r" width="$bar_w" height="$bar_h" fill="#FFFFFF"/>
+  <rect x="$bar_x" y="$bar_y" rx="$bar_r" ry="$bar_r" width="$fill_w" height="$bar_h" fill="#000000"/>
+  <text x="$cx" y="$sub_y" font-size="48" font-family="DejaVu Sans, Arial, sans-serif" fill="#000000" text-anchor="middle">$sub</text>
+  <text x="$cx" y="$period_y" font-size="36" font-family="DejaVu Sans, Arial, sans-serif" fill="#000000" text-anchor="middle">$period_label</text>
+</svg>""")
+
+def bar_layout(km, goal_km, W, PAD, th):
+    """Progressbarens geometri -> (bar_w, bar_h, bar_x, bar_y, fill_w)."""
+    bar_w = W - 2 * PAD - 160
+    bar_h = 50
+    bar_x = (W - bar_w) // 2
+    bar_y = PAD + 70 + th + 60
+    pct = 0.0 if goal_km <= 0 else max(0.0, min(1.0, km / goal_km))
+    fill_w = int(bar_w * pct)
+    return bar_w, bar_h, bar_x, bar_y, fill_w
+
 def draw_style_3(km, goal_km, period_label, out_png, out_svg):
-    # Canvas
+    # Canvas med kortbakgrund
     W, H = 1200, 700
     PAD = 60
-    img = Image.new("RGB", (W, H), WHITE)
+    card_r = 28
+    img = card_canvas(W, H, PAD, card_r)
     d = ImageDraw.Draw(img)
 
     f_big = load_font(140, bold=True)    # stor siffra
     f_med = load_font(48, bold=False)    # undertext
     f_small = load_font(36, bold=False)  # period
 
-    # Kort bakgrund
-    card_r = 28
-    d.rounded_rectangle([PAD, PAD, W-PAD, H-PAD], radius=card_r, fill=YELLOW, outline=None)
-
     # Stor siffra, ex "376 km"
     km_int = int(round(km))
     goal_int = int(round(goal_km))
@@ -175,18 +434,13 @@ def draw_style_3(km, goal_km, period_label, out_png, out_svg):
     d.text(((W - tw) / 2, PAD + 70), km_txt, font=f_big, fill=BLACK)
 
     # Progressbar
-    bar_w = W - 2 * PAD - 160
-    bar_h = 50
-    bar_x = (W - bar_w) // 2
-    bar_y = PAD + 70 + th + 60
+    bar_w, bar_h, bar_x, bar_y, fill_w = bar_layout(km, goal_km, W, PAD, th)
 
     # back
-    d.rounded_rectangle([bar_x, bar_y, bar_x + bar_w, bar_y + bar_h], radius=bar_h // 2, fill=WHITE)
+    paste_rounded(img, (bar_x, bar_y), bar_w, bar_h, bar_h // 2, WHITE)
     # fill
-    pct = 0.0 if goal_km <= 0 else max(0.0, min(1.0, km / goal_km))
-    fill_w = int(bar_w * pct)
     if fill_w > 0:
-        d.rounded_rectangle([bar_x, bar_y, bar_x + fill_w, bar_y + bar_h], radius=bar_h // 2, fill=BLACK)
+        paste_rounded(img, (bar_x, bar_y), fill_w, bar_h, bar_h // 2, BLACK)
 
     # Undertext
     sub = f"{km_int} / {goal_int} km cyklade"
@@ -199,28 +453,23 @@ def draw_style_3(km, goal_km, period_label, out_png, out_svg):
 
     # Spara PNG
     os.makedirs(os.path.dirname(out_png), exist_ok=True)
-    img.save(out_png, format="PNG", optimize=True)
+    img.save(out_png, format="PNG", optimize=False, compress_level=1)
 
     # Enkel SVG (om du vill bädda SVG istället)
-    svg = f"""<?xml version="1.0" encoding="UTF-8"?>
-<svg width="{W}" height="{H}" viewBox="0 0 {W} {H}" xmlns="http://www.w3.org/2000/svg">
-  <rect x="0" y="0" width="{W}" height="{H}" fill="#FFFFFF"/>
-  <rect x="{PAD}" y="{PAD}" rx="{card_r}" ry="{card_r}" width="{W-2*PAD}" height="{H-2*PAD}" fill="#FEDD00"/>
-  <text x="{W/2}" y="{PAD+70+110}" font-size="140" font-family="DejaVu Sans, Arial, sans-serif" font-weight="700" fill="#000000" text-anchor="middle">{km_txt}</text>
-  <rect x="{bar_x}" y="{bar_y}" rx="{bar_h/2}" ry="{bar_h/2}" width="{bar_w}" height="{bar_h}" fill="#FFFFFF"/>
-  <rect x="{bar_x}" y="{bar_y}" rx="{bar_h/2}" ry="{bar_h/2}" width="{fill_w}" height="{bar_h}" fill="#000000"/>
-  <text x="{W/2}" y="{bar_y + bar_h + 30 + 40}" font-size="48" font-family="DejaVu Sans, Arial, sans-serif" fill="#000000" text-anchor="middle">{sub}</text>
-  <text x="{W/2}" y="{bar_y + bar_h + 30 + 40 + 18 + 36}" font-size="36" font-family="DejaVu Sans, Arial, sans-serif" fill="#000000" text-anchor="middle">{period_label}</text>
-</svg>"""
-    with open(out_svg, "w", encoding="utf-8") as f:
-        f.write(svg)
+    svg = SVG_TMPL.substitute(
+        W=W, H=H, PAD=PAD, card_r=card_r,
+        card_w=W - 2 * PAD, card_h=H - 2 * PAD,
+        cx=W / 2, km_y=PAD + 70 + 110, km_txt=km_txt,
+        bar_x=bar_x, bar_y=bar_y, bar_w=bar_w, bar_h=bar_h, bar_r=bar_h / 2, fill_w=fill_w,
+        sub_y=bar_y + bar_h + 30 + 40, sub=sub,
+        period_y=bar_y + bar_h + 30 + 40 + 18 + 36, period_label=period_label,
+    )
+    Path(out_svg).write_bytes(svg.encode("utf-8"))
 
 # ---------------------------
 # Main
 # ---------------------------
 def main():
-    access = refresh_access_token()
-
     period_start = env("PERIOD_START", "2025-10-01")  # skarp default
     period_end = env("PERIOD_END", None)              # None => idag (UTC)
     if not period_end or str(period_end).strip() == "":
@@ -238,7 +487,26 @@ def main():
             "Kör workflow i test_mode=true eller justera update.yml."
         )
 
-    km = fetch_km(access, period_start, period_end)
+    # Cachat resultat för samma period inom CACHE_TTL_SECONDS => inga API-anrop
+    cache_ttl = float(env("CACHE_TTL_SECONDS", "3600"))
+    cache_path = km_cache_path(period_start, period_end)
+    cached = cache_read(cache_path)
+    if cached and time.time() - cached.get("ts", 0) < cache_ttl:
+        km = float(cached["km"])
+    else:
+        access, from_cache = refresh_access_token()
+        try:
+            km = fetch_km(access, period_start, period_end)
+        except StravaUnauthorized:
+            if not from_cache:
+                raise
+            # Cachad token kan vara utgången/återkallad: hämta ny och försök en gång till
+            access, _ = refresh_access_token(force=True)
+            km = fetch_km(access, period_start, period_end)
+        try:
+            cache_write(cache_path, {"ts": time.time(), "km": km})
+        except OSError:
+            pass  # cachen är best-effort
 
     os.makedirs("docs", exist_ok=True)
     out_png = os.path.join("docs", "strava_km.png")
@@ -246,8 +514,7 @@ def main():
     draw_style_3(km, goal_km, label, out_png, out_svg)
 
     # Liten txt för enkelhet/debug
-    with open(os.path.join("docs", "latest.txt"), "w", encoding="utf-8") as f:
-        f.write(f"{int(round(km))} / {int(round(goal_km))} km")
+    Path("docs", "latest.txt").write_bytes(f"{int(round(km))} / {int(round(goal_km))} km".encode("utf-8"))
 
 if __name__ == "__main__":
     main()